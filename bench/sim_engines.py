@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+# License: BSD
+
+# Reports simulated cycles/second of the litex.gen.sim engines.
+
+import time
+import argparse
+
+from migen import *
+
+from litex.gen.sim import Simulator
+from litex.gen.sim.core import engines
+
+from litex.soc.interconnect.stream import Gearbox, SyncFIFO
+from litex.soc.cores.code_8b10b import Encoder
+from litex.soc.cores.prbs import PRBS31Generator, PRBS31Checker
+
+
+class BenchDUT(Module):
+    def __init__(self):
+        self.submodules.gearbox0 = Gearbox(20, 32)
+        self.submodules.gearbox1 = Gearbox(32, 20)
+        self.submodules.fifo = SyncFIFO([("data", 20)], 16)
+        self.submodules.encoder = Encoder(4)
+        self.submodules.prbs_generator = PRBS31Generator(32)
+        self.submodules.prbs_checker = PRBS31Checker(32)
+        self.comb += [
+            self.gearbox0.source.connect(self.gearbox1.sink),
+            self.gearbox1.source.connect(self.fifo.sink),
+            self.fifo.source.ready.eq(1),
+            self.prbs_checker.i.eq(self.prbs_generator.o),
+        ]
+        for i, d in enumerate(self.encoder.d):
+            self.comb += d.eq(self.prbs_generator.o[8*i:8*(i+1)])
+
+
+def generator(dut, cycles):
+    for i in range(cycles):
+        yield dut.gearbox0.sink.valid.eq(1)
+        yield dut.gearbox0.sink.data.eq(i)
+        yield
+
+
+def bench(engine, cycles):
+    dut = BenchDUT()
+    sim = Simulator(dut, generator(dut, cycles), engine=engine)
+    start = time.perf_counter()
+    sim.run()
+    duration = time.perf_counter() - start
+    sim.close()
+    return cycles/duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="litex.gen.sim engines benchmark")
+    parser.add_argument("--cycles", default=2000, type=int, help="number of simulated cycles")
+    parser.add_argument("--engine", action="append", choices=list(engines.keys()),
+                        help="engine(s) to benchmark (default: all)")
+    args = parser.parse_args()
+
+    results = {}
+    for engine in args.engine or engines.keys():
+        results[engine] = bench(engine, args.cycles)
+        print("{:>12s}: {:10.1f} cycles/s".format(engine, results[engine]))
+    if len(results) > 1:
+        reference = results.get("interpreted", min(results.values()))
+        for engine, cycles_per_second in results.items():
+            print("{:>12s}: x{:.2f}".format(engine, cycles_per_second/reference))
+
+
+if __name__ == "__main__":
+    main()
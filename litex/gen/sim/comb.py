@@ -0,0 +1,162 @@
+# License: BSD
+
+import heapq
+
+from migen.fhdl.structure import *
+from migen.fhdl.specials import _MemoryLocation
+from migen.fhdl.visit import NodeVisitor
+from migen.fhdl.tools import group_by_targets
+
+
+class _InputLister(NodeVisitor):
+    # Unlike migen.fhdl.tools.list_inputs, this also collects the signals
+    # read on the left hand side of assignments (array keys, memory indexes)
+    # and resolves clock/reset signals to the signals of their domain.
+    def __init__(self, clock_domains, replaced_memories):
+        self.clock_domains = clock_domains
+        self.replaced_memories = replaced_memories
+        self.output_list = set()
+        self.target_context = False
+
+    def visit_Signal(self, node):
+        if not self.target_context:
+            self.output_list.add(node)
+
+    def visit_ClockSignal(self, node):
+        if not self.target_context:
+            self.output_list.add(self.clock_domains[node.cd].clk)
+
+    def visit_ResetSignal(self, node):
+        rst = self.clock_domains[node.cd].rst
+        if not self.target_context and rst is not None:
+            self.output_list.add(rst)
+
+    def visit_Assign(self, node):
+        self.target_context = True
+        self.visit(node.l)
+        self.target_context = False
+        self.visit(node.r)
+
+    def _visit_key(self, key):
+        target_context = self.target_context
+        self.target_context = False
+        self.visit(key)
+        self.target_context = target_context
+
+    def visit_ArrayProxy(self, node):
+        self._visit_key(node.key)
+        for choice in node.choices:
+            self.visit(choice)
+
+    def visit_unknown(self, node):
+        if isinstance(node, _MemoryLocation):
+            self._visit_key(node.index)
+            for signal in self.replaced_memories.get(node.memory, []):
+                self.visit(signal)
+        else:
+            NodeVisitor.visit_unknown(self, node)
+
+
+def list_comb_inputs(node, clock_domains, replaced_memories={}):
+    lister = _InputLister(clock_domains, replaced_memories)
+    lister.visit(node)
+    return lister.output_list
+
+
+def _topological_order(groups, dependents):
+    # Kahn's algorithm. Groups that are part of a combinatorial loop never
+    # reach a zero in-degree: they are appended in their original order and
+    # the propagation fixpoint takes care of them.
+    indegree = [0]*len(groups)
+    for i in range(len(groups)):
+        for j in dependents[i]:
+            if j != i:
+                indegree[j] += 1
+    ready = [i for i, d in enumerate(indegree) if not d]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        i = heapq.heappop(ready)
+        order.append(i)
+        for j in dependents[i]:
+            if j != i:
+                indegree[j] -= 1
+                if not indegree[j]:
+                    heapq.heappush(ready, j)
+    ordered = set(order)
+    order += [i for i in range(len(groups)) if i not in ordered]
+    return order
+
+
+class CombScheduler:
+    """Event-driven propagation of combinatorial statements.
+
+    Statements are grouped by targets (as in the Verilog backend), each
+    group is compiled separately and a dependency graph is built from the
+    signals each group reads. Groups are numbered in topological order;
+    on propagation only the groups whose inputs changed are re-evaluated,
+    lowest number first, and their outputs are committed immediately so
+    that downstream groups see them in the same pass.
+    """
+    def __init__(self, evaluator, statements):
+        self.evaluator = evaluator
+
+        groups = group_by_targets(statements)
+        inputs = [list_comb_inputs(stmts, evaluator.clock_domains,
+                                   evaluator.replaced_memories)
+                  for targets, stmts in groups]
+        drivers = dict()
+        for i, (targets, stmts) in enumerate(groups):
+            for target in targets:
+                drivers.setdefault(target, []).append(i)
+        dependents = [set() for group in groups]
+        for i, group_inputs in enumerate(inputs):
+            for signal in group_inputs:
+                for driver in drivers.get(signal, []):
+                    dependents[driver].add(i)
+
+        order = _topological_order(groups, dependents)
+        rank = {group: n for n, group in enumerate(order)}
+
+        self.statements = [groups[i][1] for i in order]
+        self.groups = [evaluator.compile(statements)
+                       for statements in self.statements]
+        self.dependents = dict()
+        for n, i in enumerate(order):
+            for signal in inputs[i]:
+                self.dependents.setdefault(signal, []).append(n)
+        self.queued = bytearray(len(self.groups))
+
+    def propagate(self, modified, everything=False):
+        groups = self.groups
+        dependents = self.dependents
+        queued = self.queued
+        commit = self.evaluator.commit
+
+        if everything:
+            pending = list(range(len(groups)))
+            for n in pending:
+                queued[n] = 1
+        else:
+            pending = []
+            for signal in modified:
+                for n in dependents.get(signal, ()):
+                    if not queued[n]:
+                        queued[n] = 1
+                        pending.append(n)
+            heapq.heapify(pending)
+
+        all_modified = set(modified)
+        while pending:
+            n = heapq.heappop(pending)
+            queued[n] = 0
+            groups[n]()
+            modified = commit()
+            if modified:
+                all_modified |= modified
+                for signal in modified:
+                    for m in dependents.get(signal, ()):
+                        if not queued[m]:
+                            queued[m] = 1
+                            heapq.heappush(pending, m)
+        return all_modified
@@ -0,0 +1,292 @@
+# License: BSD
+
+import collections
+
+from migen.fhdl.structure import *
+from migen.fhdl.structure import (_Operator, _Slice, _ArrayProxy, _Assign)
+from migen.fhdl.bitcontainer import value_bits_sign
+from migen.fhdl.specials import _MemoryLocation
+
+
+# Python source for the simple binary operators, "-" and "m" are handled
+# separately.
+_binops = {
+    "+":   "+",
+    "*":   "*",
+
+    ">>>": ">>",
+    "<<<": "<<",
+
+    "&":   "&",
+    "^":   "^",
+    "|":   "|",
+
+    "<":   "<",
+    "<=":  "<=",
+    "==":  "==",
+    "!=":  "!=",
+    ">":   ">",
+    ">=":  ">=",
+}
+
+
+def _truncate_expr(expr, nbits, signed):
+    mask = 2**nbits - 1
+    if signed:
+        half = 2**(nbits - 1)
+        return "((({}) + {}) & {}) - {}".format(expr, half, mask, half)
+    else:
+        return "(({}) & {})".format(expr, mask)
+
+
+class StatementCompiler:
+    """Compiles migen statement lists into Python functions.
+
+    The statement tree is walked once and turned into Python source where
+    masks, shifts and clock domain lookups are constants. Signals are bound
+    as globals of the generated code and values are read from / written to
+    the evaluator's ``signal_values`` / ``modifications`` dicts, so the
+    compiled code is interchangeable with ``Evaluator.execute``.
+
+    Anything the compiler does not know about falls back to the interpreter
+    at run time, which keeps the semantics (and error reporting) identical.
+    """
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.namespace = {
+            "V":       evaluator.signal_values,
+            "M":       evaluator.modifications,
+            "_eval":   evaluator.eval,
+            "_exec":   evaluator.execute,
+            "_assign": evaluator.assign,
+        }
+        self.objects = dict()
+        self.helpers = []
+        self.ntemps = 0
+
+    # helpers
+
+    def _bind(self, obj, prefix="_o"):
+        try:
+            return self.objects[id(obj)][0]
+        except KeyError:
+            name = "{}{}".format(prefix, len(self.objects))
+            # keep a reference so that id() can not be reused
+            self.objects[id(obj)] = (name, obj)
+            self.namespace[name] = obj
+            return name
+
+    def _temp(self):
+        self.ntemps += 1
+        return "_t{}".format(self.ntemps)
+
+    def _signal(self, signal):
+        self.evaluator.signal_values.setdefault(signal, signal.reset.value)
+        return self._bind(signal, "_s")
+
+    def _function(self, args, body):
+        name = "_f{}".format(len(self.helpers))
+        src = ["def {}({}):".format(name, ", ".join(args))]
+        src += ["    " + line for line in body]
+        self.helpers.append("\n".join(src))
+        return name
+
+    def _function_table(self, functions):
+        name = "_ft{}".format(len(self.helpers))
+        self.helpers.append("{} = ({},)".format(name, ", ".join(functions)))
+        return name
+
+    def _clock_domain(self, cd):
+        return self.evaluator.clock_domains[cd]
+
+    # expressions
+
+    def expr(self, node, postcommit=False):
+        if isinstance(node, Constant):
+            return repr(node.value)
+        elif isinstance(node, Signal):
+            s = self._signal(node)
+            if postcommit:
+                return "M.get({s}, V[{s}])".format(s=s)
+            else:
+                return "V[{}]".format(s)
+        elif isinstance(node, _Operator):
+            operands = [self.expr(o, postcommit) for o in node.operands]
+            if node.op == "-":
+                if len(operands) == 1:
+                    return "(-{})".format(*operands)
+                else:
+                    return "({} - {})".format(*operands)
+            elif node.op == "~":
+                return "(~{})".format(*operands)
+            elif node.op == "m":
+                return "({1} if {0} else {2})".format(*operands)
+            elif node.op in _binops:
+                return "({} {} {})".format(operands[0], _binops[node.op],
+                                           operands[1])
+        elif isinstance(node, _Slice):
+            v = self.expr(node.value, postcommit)
+            mask = 2**(node.stop - node.start) - 1
+            if node.start:
+                return "(({} >> {}) & {})".format(v, node.start, mask)
+            else:
+                return "({} & {})".format(v, mask)
+        elif isinstance(node, Cat):
+            shift = 0
+            r = []
+            for element in node.l:
+                nbits = len(element)
+                e = "({} & {})".format(self.expr(element, postcommit),
+                                       2**nbits - 1)
+                if shift:
+                    e = "({} << {})".format(e, shift)
+                r.append(e)
+                shift += nbits
+            if not r:
+                return "0"
+            return "(" + " | ".join(r) + ")"
+        elif isinstance(node, Replicate):
+            nbits = len(node.v)
+            factor = sum(1 << i*nbits for i in range(node.n))
+            return "(({} & {}) * {})".format(self.expr(node.v, postcommit),
+                                             2**nbits - 1, factor)
+        elif isinstance(node, _ArrayProxy):
+            key = "min({}, {})".format(len(node.choices) - 1,
+                                       self.expr(node.key, postcommit))
+            if all(isinstance(c, Signal) for c in node.choices):
+                choices = self._bind(tuple(self._signal_choice(c)
+                                           for c in node.choices), "_a")
+                if postcommit:
+                    return "_pget({}[{}])".format(choices, key)
+                else:
+                    return "V[{}[{}]]".format(choices, key)
+            readers = self._function_table([
+                self._function([], ["return " + self.expr(c, postcommit)])
+                for c in node.choices])
+            return "{}[{}]()".format(readers, key)
+        elif isinstance(node, _MemoryLocation):
+            array = self.evaluator.replaced_memories[node.memory]
+            storage = self._bind(tuple(self._signal_choice(s) for s in array),
+                                 "_a")
+            index = self.expr(node.index, postcommit)
+            if postcommit:
+                return "_pget({}[{}])".format(storage, index)
+            else:
+                return "V[{}[{}]]".format(storage, index)
+        elif isinstance(node, ClockSignal):
+            return self.expr(self._clock_domain(node.cd).clk, postcommit)
+        elif isinstance(node, ResetSignal):
+            rst = self._clock_domain(node.cd).rst
+            if rst is not None:
+                return self.expr(rst, postcommit)
+            elif node.allow_reset_less:
+                return "0"
+        # unsupported node: defer to the interpreter (and its errors)
+        return "_eval({}, {})".format(self._bind(node), postcommit)
+
+    def _signal_choice(self, signal):
+        self._signal(signal)
+        return signal
+
+    # statements
+
+    def assign(self, node, value, indent):
+        pad = "    "*indent
+        if isinstance(node, Signal):
+            assert not node.variable
+            return [pad + "M[{}] = {}".format(self._signal(node),
+                    _truncate_expr(value, node.nbits, node.signed))]
+        elif isinstance(node, Cat):
+            t = self._temp()
+            r = [pad + "{} = {}".format(t, value)]
+            shift = 0
+            for element in node.l:
+                nbits = len(element)
+                if shift:
+                    v = "(({} >> {}) & {})".format(t, shift, 2**nbits - 1)
+                else:
+                    v = "({} & {})".format(t, 2**nbits - 1)
+                r += self.assign(element, v, indent)
+                shift += nbits
+            return r
+        elif isinstance(node, _Slice):
+            t = self._temp()
+            clear = ~((2**node.stop - 1) - (2**node.start - 1))
+            width_mask = 2**(node.stop - node.start) - 1
+            full = "(({} & {}) | (({} & {}) << {}))".format(
+                self.expr(node.value, True), clear,
+                value, width_mask, node.start)
+            return [pad + "{} = {}".format(t, full)] + \
+                self.assign(node.value, t, indent)
+        elif isinstance(node, _ArrayProxy):
+            key = "min({}, {})".format(len(node.choices) - 1,
+                                       self.expr(node.key))
+            if all(isinstance(c, Signal) for c in node.choices):
+                choices = self._bind(tuple(self._signal_choice(c)
+                                           for c in node.choices), "_a")
+                return [pad + "_set({}[{}], {})".format(choices, key, value)]
+            writers = self._function_table([
+                self._function(["_v"], self.assign(c, "_v", 0))
+                for c in node.choices])
+            return [pad + "{}[{}]({})".format(writers, key, value)]
+        elif isinstance(node, _MemoryLocation):
+            array = self.evaluator.replaced_memories[node.memory]
+            storage = self._bind(tuple(self._signal_choice(s) for s in array),
+                                 "_a")
+            return [pad + "_set({}[{}], {})".format(
+                storage, self.expr(node.index), value)]
+        else:
+            return [pad + "_assign({}, {})".format(self._bind(node), value)]
+
+    def statements(self, statements, indent):
+        pad = "    "*indent
+        r = []
+        for s in statements:
+            if isinstance(s, _Assign):
+                r += self.assign(s.l, self.expr(s.r), indent)
+            elif isinstance(s, If):
+                if isinstance(s.cond, Signal):
+                    # stored values are already truncated
+                    cond = self.expr(s.cond)
+                else:
+                    cond = "{} & {}".format(self.expr(s.cond),
+                                            2**len(s.cond) - 1)
+                r.append(pad + "if {}:".format(cond))
+                r += self.statements(s.t, indent + 1) or [pad + "    pass"]
+                if s.f:
+                    r.append(pad + "else:")
+                    r += self.statements(s.f, indent + 1) or [pad + "    pass"]
+            elif isinstance(s, Case):
+                nbits, signed = value_bits_sign(s.test)
+                t = self._temp()
+                r.append(pad + "{} = {}".format(t,
+                         _truncate_expr(self.expr(s.test), nbits, signed)))
+                keyword = "if"
+                for k, v in s.cases.items():
+                    if isinstance(k, Constant):
+                        r.append(pad + "{} {} == {}:".format(keyword, t,
+                                                             k.value))
+                        r += self.statements(v, indent + 1) or \
+                            [pad + "    pass"]
+                        keyword = "elif"
+                if "default" in s.cases:
+                    default = self.statements(s.cases["default"], indent + 1)
+                    if keyword == "if":
+                        r += [pad + "if True:"] + (default or [pad + "    pass"])
+                    elif default:
+                        r += [pad + "else:"] + default
+            elif (isinstance(s, collections.abc.Iterable)
+                    and not isinstance(s, str)):
+                r += self.statements(s, indent)
+            else:
+                r.append(pad + "_exec([{}])".format(self._bind(s)))
+        return r
+
+    def compile(self, statements, name="_execute"):
+        body = self.statements(statements, 1) or ["    pass"]
+        src = "\n\n".join(self.helpers + [
+            "def {}():\n".format(name) + "\n".join(body)])
+        code = compile(src, "<litex.gen.sim compiled {}>".format(name), "exec")
+        exec(code, self.namespace)
+        return self.namespace[name]
+
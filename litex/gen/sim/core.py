@@ -9,8 +9,9 @@
 
 import operator
 import collections
+import collections.abc
 import inspect
-from functools import wraps
+from functools import wraps, partial
 
 from migen.fhdl.structure import *
 from migen.fhdl.structure import (_Value, _Statement,
@@ -25,6 +26,8 @@ from migen.fhdl.module import Module
 from migen.genlib.resetsync import AsyncResetSynchronizer
 
 from litex.gen.sim.vcd import VCDWriter, DummyVCDWriter
+from litex.gen.sim.compiler import StatementCompiler
+from litex.gen.sim.comb import CombScheduler
 
 
 class ClockState:
@@ -223,7 +226,7 @@ class Evaluator:
                         break
                 if not found and "default" in s.cases:
                     self.execute(s.cases["default"])
-            elif isinstance(s, collections.Iterable):
+            elif isinstance(s, collections.abc.Iterable):
                 self.execute(s)
             elif isinstance(s, Display):
                 args = []
@@ -237,6 +240,23 @@ class Evaluator:
             else:
                 raise NotImplementedError
 
+    def compile(self, statements):
+        return partial(self.execute, statements)
+
+
+class CompiledEvaluator(Evaluator):
+    def compile(self, statements):
+        compiler = StatementCompiler(self)
+        compiler.namespace["_set"] = self.assign
+        compiler.namespace["_pget"] = partial(self.eval, postcommit=True)
+        return compiler.compile(statements)
+
+
+engines = {
+    "interpreted": Evaluator,
+    "compiled":    CompiledEvaluator,
+}
+
 
 class DummyAsyncResetSynchronizerImpl(Module):
     def __init__(self, cd, async_reset):
@@ -255,7 +275,7 @@ class DummyAsyncResetSynchronizer:
 # TODO: instances via Iverilog/VPI
 class Simulator:
     def __init__(self, fragment_or_module, generators, clocks={"sys": 10}, vcd_name=None,
-                 special_overrides={}):
+                 special_overrides={}, engine="interpreted"):
         if isinstance(fragment_or_module, _Fragment):
             self.fragment = fragment_or_module
         else:
@@ -275,7 +295,7 @@ class Simulator:
         self.generators = dict()
         self.passive_generators = set()
         for k, v in generators.items():
-            if (isinstance(v, collections.Iterable)
+            if (isinstance(v, collections.abc.Iterable)
                     and not inspect.isgenerator(v)):
                 self.generators[k] = list(v)
             else:
@@ -294,8 +314,15 @@ class Simulator:
         # comb signals return to their reset value if nothing assigns them
         self.fragment.comb[0:0] = [s.eq(s.reset)
                                    for s in list_targets(self.fragment.comb)]
-        self.evaluator = Evaluator(self.fragment.clock_domains,
-                                   mta.replacements)
+        try:
+            evaluator_cls = engines[engine]
+        except KeyError:
+            raise ValueError("Unknown simulation engine: '{}'".format(engine))
+        self.evaluator = evaluator_cls(self.fragment.clock_domains,
+                                       mta.replacements)
+        self.comb = CombScheduler(self.evaluator, self.fragment.comb)
+        self.sync = {cd: self.evaluator.compile(statements)
+            for cd, statements in self.fragment.sync.items()}
 
         if vcd_name is None:
             self.vcd = DummyVCDWriter()
@@ -322,15 +349,9 @@ class Simulator:
     def close(self):
         self.vcd.close()
 
-    def _commit_and_comb_propagate(self):
-        # TODO: optimize
-        all_modified = set()
+    def _commit_and_comb_propagate(self, everything=False):
         modified = self.evaluator.commit()
-        all_modified |= modified
-        while modified:
-            self.evaluator.execute(self.fragment.comb)
-            modified = self.evaluator.commit()
-            all_modified |= modified
+        all_modified = self.comb.propagate(modified, everything)
         for signal in all_modified:
             self.vcd.set(signal, self.evaluator.signal_values[signal])
 
@@ -377,16 +398,15 @@ class Simulator:
         return False
 
     def run(self):
-        self.evaluator.execute(self.fragment.comb)
-        self._commit_and_comb_propagate()
+        self._commit_and_comb_propagate(everything=True)
 
         while True:
             dt, rising, falling = self.time.tick()
             self.vcd.delay(dt)
             for cd in rising:
                 self.evaluator.assign(self.fragment.clock_domains[cd].clk, 1)
-                if cd in self.fragment.sync:
-                    self.evaluator.execute(self.fragment.sync[cd])
+                if cd in self.sync:
+                    self.sync[cd]()
                 if cd in self.generators:
                     self._process_generators(cd)
             for cd in falling:
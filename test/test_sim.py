@@ -0,0 +1,126 @@
+# License: BSD
+
+import unittest
+import random
+
+from migen import *
+from migen.sim import run_simulation as migen_run_simulation
+
+from litex.gen.sim import run_simulation
+
+from litex.soc.interconnect.stream import Gearbox, SyncFIFO
+from litex.soc.cores.code_8b10b import Encoder
+from litex.soc.cores.prbs import PRBS31Generator
+
+
+class ExpressionsDUT(Module):
+    def __init__(self):
+        self.a = Signal(8)
+        self.b = Signal((8, True))
+        self.sel = Signal(2)
+        self.o_comb = Signal(16)
+        self.o_signed = Signal((12, True))
+        self.o_sync = Signal(16)
+        self.o_array = Signal(8)
+        self.o_case = Signal(4)
+
+        # # #
+
+        array = Array([self.a, self.b[:4], Cat(self.a[4:], self.b[4:]), 7])
+        counter = Signal(4)
+        self.comb += [
+            self.o_comb.eq(Cat(self.a[::-1], Replicate(self.b[7], 4), ~self.sel)),
+            self.o_signed.eq(self.b*3 - self.a),
+            self.o_array.eq(array[self.sel]),
+            Case(self.a[:3], {
+                0: self.o_case.eq(1),
+                3: self.o_case.eq(self.b[4:]),
+                "default": self.o_case.eq(Mux(self.b < 0, 2, 5))
+            })
+        ]
+        self.sync += [
+            counter.eq(counter + 1),
+            If(self.a > self.b,
+                self.o_sync[8:].eq(self.a + self.b),
+            ).Elif(self.sel == 2,
+                self.o_sync[:4].eq(counter),
+                array[self.sel].eq(0)
+            ).Else(
+                self.o_sync.eq(self.o_sync >> 1)
+            )
+        ]
+
+
+class CombChainDUT(Module):
+    def __init__(self):
+        self.a = Signal(8)
+        self.b = Signal(8)
+        self.c = Signal(8)
+        self.d = Signal(9)
+        self.e = Signal(4)
+        self.f = Signal(4)
+
+        # # #
+
+        # statements are listed against the dependency order and the last
+        # group reads one of its own targets.
+        self.comb += [
+            self.d.eq(self.c + 1),
+            self.c.eq(self.b ^ self.a),
+            self.b.eq(self.a[::-1]),
+            Cat(self.e, self.f).eq(self.d),
+            self.f.eq(self.e + self.f[0])
+        ]
+
+
+def stimulus(inputs, outputs, trace, cycles=256, seed=42):
+    prng = random.Random(seed)
+    for i in range(cycles):
+        for signal in inputs:
+            yield signal.eq(prng.randrange(2**len(signal)))
+        yield
+        trace.append(tuple((yield list(outputs))))
+
+
+def simulate(dut_factory, io_factory, run=run_simulation, **kwargs):
+    dut = dut_factory()
+    inputs, outputs = io_factory(dut)
+    trace = []
+    run(dut, stimulus(inputs, outputs, trace), **kwargs)
+    return trace
+
+
+class TestSim(unittest.TestCase):
+    duts = {
+        "expressions": (ExpressionsDUT,
+            lambda dut: ([dut.a, dut.b, dut.sel],
+                         [dut.o_comb, dut.o_signed, dut.o_sync, dut.o_array,
+                          dut.o_case, dut.a, dut.b])),
+        "comb_chain": (CombChainDUT,
+            lambda dut: ([dut.a], [dut.b, dut.c, dut.d, dut.e, dut.f])),
+        "gearbox": (lambda: Gearbox(20, 32),
+            lambda dut: ([dut.sink.valid, dut.sink.data, dut.source.ready],
+                         [dut.sink.ready, dut.source.valid, dut.source.data])),
+        "fifo": (lambda: SyncFIFO([("data", 16)], 8),
+            lambda dut: ([dut.sink.valid, dut.sink.data, dut.source.ready],
+                         [dut.sink.ready, dut.source.valid, dut.source.data,
+                          dut.level])),
+        "8b10b": (lambda: Encoder(2),
+            lambda dut: (dut.d + dut.k, dut.output + dut.disparity)),
+        "prbs31": (lambda: PRBS31Generator(32),
+            lambda dut: ([], [dut.o])),
+    }
+
+    def test_engines(self):
+        for name, (dut_factory, io_factory) in self.duts.items():
+            with self.subTest(dut=name):
+                reference = simulate(dut_factory, io_factory,
+                                     run=migen_run_simulation)
+                self.assertEqual(len(reference), 256)
+                for engine in ["interpreted", "compiled"]:
+                    trace = simulate(dut_factory, io_factory, engine=engine)
+                    self.assertEqual(trace, reference)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            simulate(*self.duts["prbs31"], engine="verilator")